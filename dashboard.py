@@ -5,105 +5,192 @@ Shows top events by total volume, with top-5 contenders, prices in cents, and 24
 Usage: python3 dashboard.py [--limit N] [--refresh SECONDS]
 """
 
-import json
-import subprocess
+import asyncio
 import sys
 import time
 import argparse
+from functools import lru_cache
+from operator import itemgetter
 from urllib.parse import urlencode
 from datetime import datetime, timezone
 
-from rich.console import Console
+import httpx
+import numpy as np
+import orjson
+from rich.console import Console, ConsoleOptions
+from rich.segment import Segment
 from rich.table import Table
 from rich.panel import Panel
 from rich.text import Text
 from rich.live import Live
 from rich import box
 
-PM_BIN = "/home/fipauli/polymarket/polymarket-cli/target/release/polymarket"
+try:  # optional "jit" extra: compiled top-K selection for top_contenders()
+    from numba import njit
+except ImportError:
+    njit = None
+
 console = Console()
 
 TOP_N_CONTENDERS = 5
 GAMMA_API_HOST = "gamma-api.polymarket.com"
 GAMMA_API_RESOLVE_IPS = ("104.18.34.205", "172.64.153.51")
+GAMMA_EVENTS_URL = f"https://{GAMMA_API_HOST}/events"
+GAMMA_TIMEOUT = 20  # seconds
+
+# Shared keep-alive pool for long-running callers (server.py). The terminal
+# dashboard goes through fetch_events_sync(), which owns a short-lived client
+# because each asyncio.run() call gets a fresh event loop.
+gamma_client = httpx.AsyncClient(
+    http2=True,
+    timeout=GAMMA_TIMEOUT,
+    limits=httpx.Limits(max_keepalive_connections=4),
+)
 
 
 # ─── Data fetching ────────────────────────────────────────────────────────────
 
-def fetch_events(limit: int = 10) -> list[dict]:
+def _gamma_params(fetch_count: int) -> dict:
+    return {"active": "true", "closed": "false", "limit": fetch_count}
+
+
+async def fetch_events(limit: int = 10, client: httpx.AsyncClient | None = None) -> list[dict]:
     """Fetch active events sorted by volume (fetches extra to get real top-N)."""
     fetch_count = max(limit * 5, 100)
-    result = subprocess.run(
-        [PM_BIN, "-o", "json", "events", "list",
-         "--active", "true", "--limit", str(fetch_count)],
-        capture_output=True, text=True,
-    )
-    if result.returncode != 0:
-        console.print(f"[red]Error:[/] {result.stderr.strip()}")
-        return fetch_events_via_gamma(fetch_count, limit)
+    client = client or gamma_client
+    try:
+        response = await client.get(GAMMA_EVENTS_URL, params=_gamma_params(fetch_count))
+        response.raise_for_status()
+    except httpx.HTTPError as exc:
+        console.print(f"[red]Error:[/] {exc}")
+        return await fetch_events_via_gamma(fetch_count, limit)
     try:
-        data = json.loads(result.stdout)
-        data.sort(key=lambda e: float(e.get("volume") or 0), reverse=True)
-        return data[:limit]
-    except json.JSONDecodeError as exc:
+        return await asyncio.to_thread(_decode_events, response.content, limit)
+    except orjson.JSONDecodeError as exc:
         console.print(f"[red]JSON error:[/] {exc}")
         return []
 
 
-def fetch_events_via_gamma(fetch_count: int, limit: int) -> list[dict]:
-    """Fetch directly from Gamma when local DNS prevents the CLI from resolving."""
-    query = urlencode({"active": "true", "closed": "false", "limit": fetch_count})
-    url = f"https://{GAMMA_API_HOST}/events?{query}"
+def fetch_events_sync(limit: int = 10) -> list[dict]:
+    """Blocking wrapper around fetch_events() for the terminal dashboard."""
+    async def _run() -> list[dict]:
+        async with httpx.AsyncClient(http2=True, timeout=GAMMA_TIMEOUT) as client:
+            return await fetch_events(limit, client)
+
+    return asyncio.run(_run())
+
+
+async def fetch_events_via_gamma(fetch_count: int, limit: int) -> list[dict]:
+    """Fetch via curl --resolve when local DNS cannot resolve the Gamma host."""
+    url = f"{GAMMA_EVENTS_URL}?{urlencode(_gamma_params(fetch_count))}"
 
     for ip in GAMMA_API_RESOLVE_IPS:
-        result = subprocess.run(
-            [
-                "curl",
-                "-fsS",
-                "--max-time",
-                "20",
-                "--resolve",
-                f"{GAMMA_API_HOST}:443:{ip}",
-                url,
-            ],
-            capture_output=True,
-            text=True,
+        proc = await asyncio.create_subprocess_exec(
+            "curl",
+            "-fsS",
+            "--max-time",
+            str(GAMMA_TIMEOUT),
+            "--resolve",
+            f"{GAMMA_API_HOST}:443:{ip}",
+            url,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
         )
-        if result.returncode != 0:
+        stdout, _ = await proc.communicate()
+        if proc.returncode != 0:
             continue
         try:
-            data = json.loads(result.stdout)
-        except json.JSONDecodeError as exc:
+            return await asyncio.to_thread(_decode_events, stdout, limit)
+        except orjson.JSONDecodeError as exc:
             console.print(f"[red]Fallback JSON error:[/] {exc}")
             return []
-        data.sort(key=lambda e: float(e.get("volume") or 0), reverse=True)
-        return data[:limit]
 
     console.print("[red]Fallback error:[/] could not fetch Gamma API via resolved IPs")
     return []
 
 
+def _decode_events(raw: bytes, limit: int) -> list[dict]:
+    """Parse a Gamma /events body and keep the top `limit` events by volume.
+
+    CPU-bound; callers run it in a worker thread so the event loop stays free.
+    """
+    data = orjson.loads(raw)
+    data.sort(key=lambda e: float(e.get("volume") or 0), reverse=True)
+    return _prepare_markets(data[:limit])
+
+
+def _prepare_markets(events: list[dict]) -> list[dict]:
+    """Parse and format each market's price fields once at fetch time.
+
+    The YES price is stored per market as ``m["_yes"]`` and, for ranking, as a
+    parallel float64 array ``event["_yes"]`` indexed like ``event["markets"]``.
+    The 24h change is pre-formatted for both front ends: ``m["_delta_fmt"]``
+    (Rich Text) and ``m["_delta_plain"]`` (JSON dict), and the display name is
+    resolved into ``m["_name"]``.
+    """
+    for event in events:
+        markets = event.get("markets") or []
+        for m in markets:
+            m["_name"] = m.get("groupItemTitle") or m.get("question") or "?"
+            try:
+                m["_yes"] = float(orjson.loads(m.get("outcomePrices") or "[0,1]")[0])
+            except (orjson.JSONDecodeError, IndexError, ValueError):
+                m["_yes"] = 0.0
+            delta = m.get("oneDayPriceChange")
+            m["_delta_fmt"] = fmt_delta(delta)
+            m["_delta_plain"] = fmt_delta_plain(delta)
+        event["_yes"] = np.fromiter((m["_yes"] for m in markets), dtype=np.float64, count=len(markets))
+    return events
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _topk_indices(yes, k):
+        """Indices of the k largest values in `yes`, highest first (ties keep input order)."""
+        k = min(k, yes.shape[0])
+        out = np.empty(k, dtype=np.int64)
+        filled = 0
+        for i in range(yes.shape[0]):
+            v = yes[i]
+            if filled < k:
+                j = filled
+                filled += 1
+            elif v > yes[out[k - 1]]:
+                j = k - 1
+            else:
+                continue
+            while j > 0 and yes[out[j - 1]] < v:
+                out[j] = out[j - 1]
+                j -= 1
+            out[j] = i
+        return out
+else:
+    _topk_indices = None
+
+
+_contender_fields = itemgetter("_name", "_yes", "_delta_fmt")
+
+
+def _contender(m: dict) -> dict:
+    name, yes, delta_fmt = _contender_fields(m)
+    return {"name": name, "yes": yes, "delta_fmt": delta_fmt}
+
+
 def top_contenders(event: dict) -> list[dict]:
     """Return the top-N contenders (markets) sorted by YES price descending."""
     markets = event.get("markets") or []
-    parsed = []
-    for m in markets:
-        try:
-            prices = json.loads(m.get("outcomePrices") or "[0,1]")
-            yes = float(prices[0])
-        except (json.JSONDecodeError, IndexError, ValueError):
-            yes = 0.0
-        parsed.append({
-            "name": m.get("groupItemTitle") or m.get("question") or "?",
-            "yes": yes,
-            "delta": m.get("oneDayPriceChange"),
-        })
-    parsed.sort(key=lambda c: c["yes"], reverse=True)
-    return parsed[:TOP_N_CONTENDERS]
+    yes = event["_yes"]
+    if _topk_indices is not None:
+        idx = _topk_indices(yes, TOP_N_CONTENDERS)
+    else:
+        # Stable, so equal prices keep Gamma's order exactly like the Numba kernel
+        idx = np.argsort(-yes, kind="stable")[:TOP_N_CONTENDERS]
+    return [_contender(markets[i]) for i in idx]
 
 
 # ─── Formatting helpers ────────────────────────────────────────────────────────
 
+@lru_cache(maxsize=2048)
 def fmt_vol(v) -> str:
     try:
         n = float(v or 0)
@@ -116,6 +203,7 @@ def fmt_vol(v) -> str:
     return f"${n:.0f}"
 
 
+@lru_cache(maxsize=2048)
 def fmt_price_cents(yes: float) -> str:
     """Format YES price as cents: <1¢ / 94¢ / 100¢."""
     cents = yes * 100
@@ -124,32 +212,53 @@ def fmt_price_cents(yes: float) -> str:
     return f"{cents:.0f}¢"
 
 
-def fmt_delta(delta) -> Text:
-    """Format 24h price change in cents with colour."""
+_DELTA_STYLES = {"up": "green", "down": "red", "flat": "dim"}
+
+
+@lru_cache(maxsize=2048)
+def _delta_parts(delta) -> tuple[str, str]:
+    """Return (text, direction) for a 24h price change; shared by fmt_delta*."""
     if delta is None:
-        return Text("—", style="dim")
+        return "—", "flat"
     try:
         cents = float(delta) * 100
     except (ValueError, TypeError):
-        return Text("—", style="dim")
+        return "—", "flat"
     if abs(cents) < 0.05:
-        return Text("—", style="dim")
+        return "—", "flat"
     sign = "+" if cents > 0 else ""
     arrow = "▲" if cents > 0 else "▼"
-    color = "green" if cents > 0 else "red"
-    return Text(f"{arrow}{sign}{cents:.1f}", style=color)
+    direction = "up" if cents > 0 else "down"
+    return f"{arrow}{sign}{cents:.1f}", direction
+
+
+def fmt_delta(delta) -> Text:
+    """Format 24h price change in cents with colour."""
+    # Text is mutable, so only its parts are lru-cached; _prepare_markets builds
+    # one Text per market and it is never modified after that.
+    text, direction = _delta_parts(delta)
+    return Text(text, style=_DELTA_STYLES[direction])
 
 
+def fmt_delta_plain(delta) -> dict:
+    """Return delta as a JSON-safe dict with text + direction."""
+    text, direction = _delta_parts(delta)
+    return {"text": text, "direction": direction}
+
+
+@lru_cache(maxsize=2048)
 def truncate(s: str, n: int) -> str:
-    s = str(s)
+    if type(s) is not str:
+        s = str(s)
     return s if len(s) <= n else s[: n - 1] + "…"
 
 
 # ─── Table builder ─────────────────────────────────────────────────────────────
 
+@lru_cache(maxsize=16)  # bounded: resizes add entries, the width rarely changes
 def calc_layout(width: int) -> tuple[int, int, int]:
     """Return (num_contenders, name_col_width, event_col_width) for a given terminal width."""
-    # Column widths (content + rich 1-char padding each side = +2 per col):
+    # Column widths (build_table uses zero cell padding, so content width only):
     #   #(3) + Event(35) + Total(9) + 24h(8) = 55 content
     #   separators between cols: (4 fixed cols + n*3 contender cols - 1) spaces
     #   Per contender: name_w + price(5) + delta(7) content
@@ -184,6 +293,10 @@ def calc_layout(width: int) -> tuple[int, int, int]:
     return n, name_w, EVENT_W
 
 
+# Placeholder for missing contender slots; shared, so it must never be mutated
+_EMPTY_CONTENDER = {"name": "", "yes": 0, "delta_fmt": fmt_delta(None)}
+
+
 def build_table(events: list[dict]) -> Table:
     width = console.width or 200
     n_cont, name_w, event_w = calc_layout(width)
@@ -195,26 +308,30 @@ def build_table(events: list[dict]) -> Table:
         show_edge=True,
         pad_edge=True,
         expand=False,
+        padding=(0, 0),
         title=None,
     )
 
+    # Every column has a fixed width and, with zero padding, the table is exactly
+    # as wide as calc_layout() computed; Rich neither measures nor shrinks cells.
+    # Text is pre-truncated with truncate(), so cropping never hides content.
     # Fixed columns
-    table.add_column("#",     width=3,       justify="right", style="dim",      no_wrap=True)
-    table.add_column("Event", width=event_w, justify="left",  style="bold",     no_wrap=True)
-    table.add_column("Total", width=9,       justify="right",                   no_wrap=True)
-    table.add_column("24h",   width=8,       justify="right", style="dim cyan", no_wrap=True)
+    table.add_column("#",     width=3,       justify="right", style="dim",      no_wrap=True, overflow="crop")
+    table.add_column("Event", width=event_w, justify="left",  style="bold",     no_wrap=True, overflow="crop")
+    table.add_column("Total", width=9,       justify="right",                   no_wrap=True, overflow="crop")
+    table.add_column("24h",   width=8,       justify="right", style="dim cyan", no_wrap=True, overflow="crop")
 
     # Contender groups: Name | Prc¢ | Δ24h
     for i in range(1, n_cont + 1):
-        table.add_column(f"#{i}",   width=name_w, justify="left",  style="italic", no_wrap=True)
-        table.add_column("Prc¢",    width=5,      justify="right",                 no_wrap=True)
-        table.add_column("Δ24h",    width=7,      justify="right",                 no_wrap=True)
+        table.add_column(f"#{i}",   width=name_w, justify="left",  style="italic", no_wrap=True, overflow="crop")
+        table.add_column("Prc¢",    width=5,      justify="right",                 no_wrap=True, overflow="crop")
+        table.add_column("Δ24h",    width=7,      justify="right",                 no_wrap=True, overflow="crop")
 
     for idx, event in enumerate(events, 1):
         contenders = top_contenders(event)
         # Pad to n_cont
-        while len(contenders) < n_cont:
-            contenders.append({"name": "", "yes": 0, "delta": None})
+        if len(contenders) < n_cont:
+            contenders.extend([_EMPTY_CONTENDER] * (n_cont - len(contenders)))
 
         row: list = [
             str(idx),
@@ -225,18 +342,31 @@ def build_table(events: list[dict]) -> Table:
         for c in contenders[:n_cont]:
             row.append(truncate(c["name"], name_w))
             row.append(fmt_price_cents(c["yes"]) if c["yes"] > 0 else "")
-            row.append(fmt_delta(c["delta"]))
+            row.append(c["delta_fmt"])
 
         table.add_row(*row)
 
     return table
 
 
+# (minute bucket, formatted label) of the last header; strftime runs once a minute
+_header_label: tuple[int, str] = (-1, "")
+
+
 def build_header(n: int, ts: datetime) -> Panel:
+    global _header_label
+    bucket = int(ts.timestamp() // 60)
+    if bucket != _header_label[0]:
+        _header_label = (bucket, ts.strftime('%b %d  %H:%M'))
+    return _header_panel(n, _header_label[1])
+
+
+@lru_cache(maxsize=4)
+def _header_panel(n: int, label: str) -> Panel:
     t = Text()
     t.append("  POLYMARKET  ", style="bold black on bright_cyan")
     t.append(f"  Top {n} Events by Volume  ", style="bold bright_white")
-    t.append(f"  {ts.strftime('%b %d  %H:%M')}  ", style="dim cyan")
+    t.append(f"  {label}  ", style="dim cyan")
     return Panel(t, box=box.HEAVY, border_style="cyan", padding=(0, 1))
 
 
@@ -250,15 +380,41 @@ def build_footer() -> Panel:
     return Panel(t, box=box.SIMPLE, border_style="bright_black", padding=(0, 0))
 
 
+_FOOTER = build_footer()
+
+
+class Prerendered:
+    """Render a renderable to segments once and replay them on later draws.
+
+    Live redraws its renderable every refresh tick even when nothing changed;
+    the lines are only rendered again when the available size changes.
+    """
+
+    def __init__(self, renderable) -> None:
+        self.renderable = renderable
+        self._size: tuple[int, int | None] | None = None
+        self._lines: list[list[Segment]] = []
+
+    def __rich_console__(self, console: Console, options: ConsoleOptions):
+        size = (options.max_width, options.height)
+        if size != self._size:
+            self._lines = console.render_lines(self.renderable, options, pad=False)
+            self._size = size
+        new_line = Segment.line()
+        for line in self._lines:
+            yield from line
+            yield new_line
+
+
 # ─── Main ─────────────────────────────────────────────────────────────────────
 
 def render(limit: int):
     from rich.console import Group
     now = datetime.now()
-    events = fetch_events(limit)
+    events = fetch_events_sync(limit)
     if not events:
         return Panel("[red]No data available.[/]")
-    return Group(build_header(len(events), now), build_table(events), build_footer())
+    return Prerendered(Group(build_header(len(events), now), build_table(events), _FOOTER))
 
 
 def main():
@@ -10,62 +10,104 @@ Usage:
 """
 
 import asyncio
-import json
 import os
 import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
+from operator import itemgetter
 from typing import AsyncGenerator
 
 import dashboard as _dash
+import msgspec
 from fastapi import FastAPI, Query
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
 # ─── Configuration ─────────────────────────────────────────────────────────────
 
-# Allow overriding the binary path via env var; fall back to dashboard.py default
-_dash.PM_BIN = os.environ.get("PM_BIN", _dash.PM_BIN)
-
 CACHE_TTL = int(os.environ.get("PM_CACHE_TTL", "30"))  # seconds
 
+# uvicorn --loop auto already picks uvloop; setting the policy here covers other
+# ASGI runners too. uvloop is unavailable on Windows and PyPy, which keep asyncio.
+try:
+    import uvloop
+except ImportError:
+    pass
+else:
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
 # ─── Cache ─────────────────────────────────────────────────────────────────────
 
 # { limit: (timestamp, result_list) }
 _cache: dict[int, tuple[float, list[dict]]] = {}
-_cache_lock = asyncio.Lock()
+
+# { limit: task currently refreshing that limit; every caller awaits the same one }
+_inflight: dict[int, asyncio.Task] = {}
+
+# { limit: (timestamp of the _cache entry it was built from, JSON body, SSE frame,
+#           content digest) }
+_encoded_cache: dict[int, tuple[float, bytes, bytes, int]] = {}
 
 
 async def get_events(limit: int) -> list[dict]:
-    """Fetch events with TTL cache and stampede protection."""
+    """Fetch events with TTL cache and per-limit single-flight stampede protection."""
+    if limit in _cache:
+        ts, data = _cache[limit]
+        if time.monotonic() - ts < CACHE_TTL:
+            return data
+    # Cache miss or stale — join the in-flight fetch for this limit or start one.
+    # Nothing awaits between the lookup and the insert, so no lock is needed.
+    task = _inflight.get(limit)
+    if task is None:
+        task = _inflight[limit] = asyncio.create_task(_refresh(limit))
+    # shield: a disconnecting client must not cancel the fetch for everyone else
+    return await asyncio.shield(task)
+
+
+async def _refresh(limit: int) -> list[dict]:
     now = time.monotonic()
-    async with _cache_lock:
-        if limit in _cache:
-            ts, data = _cache[limit]
-            if now - ts < CACHE_TTL:
-                return data
-        # Cache miss or stale — fetch in thread pool (blocking subprocess)
-        loop = asyncio.get_event_loop()
-        data = await loop.run_in_executor(None, _dash.fetch_events, limit)
+    try:
+        # Fetch over the shared Gamma connection pool
+        data = await _dash.fetch_events(limit)
         _cache[limit] = (now, data)
         return data
+    finally:
+        del _inflight[limit]
+
+
+# ─── Response schema ───────────────────────────────────────────────────────────
+
+class Contender(msgspec.Struct):
+    name: str
+    price: str
+    delta: dict
+    endDate: str
+
+
+class Event(msgspec.Struct):
+    rank: int
+    title: str
+    volume: str
+    volume24h: str
+    volumeRaw: float
+    volume24hRaw: float
+    endDate: str
+    contenderCount: int
+    contenders: list[Contender]
+
+
+class Payload(msgspec.Struct):
+    ts: str
+    ttl: int
+    events: list[Event]
+
+
+_encoder = msgspec.json.Encoder()
 
 
 # ─── Serialisation helpers ─────────────────────────────────────────────────────
 
-def fmt_delta_plain(delta) -> dict:
-    """Return delta as a JSON-safe dict with text + direction."""
-    if delta is None:
-        return {"text": "—", "direction": "flat"}
-    try:
-        cents = float(delta) * 100
-    except (ValueError, TypeError):
-        return {"text": "—", "direction": "flat"}
-    if abs(cents) < 0.05:
-        return {"text": "—", "direction": "flat"}
-    sign = "+" if cents > 0 else ""
-    arrow = "▲" if cents > 0 else "▼"
-    direction = "up" if cents > 0 else "down"
-    return {"text": f"{arrow}{sign}{cents:.1f}", "direction": direction}
+_contender_fields = itemgetter("_name", "_yes", "_delta_plain")
 
 
 def _all_contenders(event: dict) -> list[dict]:
@@ -73,34 +115,30 @@ def _all_contenders(event: dict) -> list[dict]:
     markets = event.get("markets") or []
     parsed = []
     for m in markets:
-        try:
-            prices = json.loads(m.get("outcomePrices") or "[0,1]")
-            yes = float(prices[0])
-        except (json.JSONDecodeError, IndexError, ValueError):
-            yes = 0.0
+        name, yes, delta = _contender_fields(m)
         parsed.append({
-            "name": m.get("groupItemTitle") or m.get("question") or "?",
+            "name": name,
             "yes": yes,
-            "delta": m.get("oneDayPriceChange"),
+            "delta": delta,
             "endDate": m.get("endDateIso") or m.get("endDate") or "",
         })
-    parsed.sort(key=lambda c: c["yes"], reverse=True)
+    parsed.sort(key=itemgetter("yes"), reverse=True)
     return parsed
 
 
-def events_to_json(events: list[dict]) -> dict:
+def events_to_json(events: list[dict]) -> Payload:
     """Convert raw event dicts to the API response shape."""
     ts = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
     result = []
     for idx, event in enumerate(events, 1):
         contenders_raw = _all_contenders(event)
         contenders = [
-            {
-                "name": c["name"],
-                "price": _dash.fmt_price_cents(c["yes"]) if c["yes"] > 0 else "",
-                "delta": fmt_delta_plain(c["delta"]),
-                "endDate": c["endDate"],
-            }
+            Contender(
+                name=c["name"],
+                price=_dash.fmt_price_cents(c["yes"]) if c["yes"] > 0 else "",
+                delta=c["delta"],
+                endDate=c["endDate"],
+            )
             for c in contenders_raw
         ]
         try:
@@ -112,24 +150,30 @@ def events_to_json(events: list[dict]) -> dict:
         except (ValueError, TypeError):
             volume24h_raw = 0.0
         result.append(
-            {
-                "rank": idx,
-                "title": event.get("title") or "?",
-                "volume": _dash.fmt_vol(event.get("volume")),
-                "volume24h": _dash.fmt_vol(event.get("volume24hr")),
-                "volumeRaw": volume_raw,
-                "volume24hRaw": volume24h_raw,
-                "endDate": event.get("endDateIso") or event.get("endDate") or "",
-                "contenderCount": len(contenders_raw),
-                "contenders": contenders,
-            }
+            Event(
+                rank=idx,
+                title=event.get("title") or "?",
+                volume=_dash.fmt_vol(event.get("volume")),
+                volume24h=_dash.fmt_vol(event.get("volume24hr")),
+                volumeRaw=volume_raw,
+                volume24hRaw=volume24h_raw,
+                endDate=event.get("endDateIso") or event.get("endDate") or "",
+                contenderCount=len(contenders_raw),
+                contenders=contenders,
+            )
         )
-    return {"ts": ts, "ttl": CACHE_TTL, "events": result}
+    return Payload(ts=ts, ttl=CACHE_TTL, events=result)
 
 
 # ─── App ───────────────────────────────────────────────────────────────────────
 
-app = FastAPI(title="Polymarket Board", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await _dash.gamma_client.aclose()
+
+
+app = FastAPI(title="Polymarket Board", version="0.1.0", lifespan=lifespan)
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -144,25 +188,51 @@ async def new_board():
     return FileResponse("static/new.html")
 
 
+async def get_encoded(limit: int) -> tuple[bytes, bytes, int]:
+    """Return (JSON body, SSE frame, digest) for `limit`, built once per cache refresh.
+
+    The digest covers the events only, not the snapshot timestamp, so equal
+    digests mean the board itself did not change.
+    """
+    events = await get_events(limit)
+    ts = _cache[limit][0]
+    # No await between the check and the store, so concurrent requests cannot
+    # interleave here and the payload is serialised exactly once.
+    cached = _encoded_cache.get(limit)
+    if cached is None or cached[0] != ts:
+        payload = events_to_json(events)
+        body = _encoder.encode(payload)
+        digest = hash(_encoder.encode(payload.events))
+        cached = _encoded_cache[limit] = (ts, body, b"data: " + body + b"\n\n", digest)
+    return cached[1], cached[2], cached[3]
+
+
 @app.get("/api/events")
 async def api_events(limit: int = Query(10, ge=1, le=100)):
     """Return a JSON snapshot of the top-N events."""
-    events = await get_events(limit)
-    return events_to_json(events)
+    body, _, _ = await get_encoded(limit)
+    return Response(body, media_type="application/json")
+
 
+async def _sse_generator(limit: int) -> AsyncGenerator[bytes, None]:
+    """Yield SSE frames: immediate snapshot, then every CACHE_TTL seconds.
 
-async def _sse_generator(limit: int) -> AsyncGenerator[str, None]:
-    """Yield SSE frames: immediate snapshot, then every CACHE_TTL seconds."""
+    Unchanged boards are not resent; a comment line keeps the connection alive.
+    """
+    last_digest = None
     while True:
-        events = await get_events(limit)
-        payload = events_to_json(events)
-        yield f"data: {json.dumps(payload)}\n\n"
+        _, frame, digest = await get_encoded(limit)
+        if digest == last_digest:
+            yield b": keepalive\n\n"
+        else:
+            last_digest = digest
+            yield frame
         await asyncio.sleep(CACHE_TTL)
 
 
 @app.get("/api/events/stream")
 async def api_events_stream(limit: int = Query(10, ge=1, le=100)):
-    """Server-Sent Events stream of top-N events, refreshed every CACHE_TTL seconds."""
+    """Server-Sent Events stream of top-N events, checked every CACHE_TTL seconds."""
     headers = {
         "Cache-Control": "no-cache",
         "X-Accel-Buffering": "no",  # disable nginx proxy buffering